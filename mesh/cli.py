@@ -5,28 +5,26 @@ Handles argument parsing and node startup.
 
 import argparse
 import asyncio
+import logging
+import re
 import signal
 import sys
-from typing import List, Set, Tuple
-
-# Try to use uvloop on Linux for better performance
-try:
-    import uvloop
-    if sys.platform != 'win32':
-        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
-except ImportError:
-    pass
+from typing import List, Optional, Set, Tuple
 
 from .node import MeshNode, Addr
 from .console import start_console
 
 
+# host:port, where host may be a bracketed IPv6 literal ([::1]:9001)
+_PEER_RE = re.compile(r'(?P<host>\[[^\]]+\]|[^:]+):(?P<port>\d{1,5})')
+
+
 def parse_peer_address(peer_str: str) -> Addr:
     """
     Parse a peer address string into (host, port) tuple.
     
     Args:
-        peer_str: Address string like "127.0.0.1:9002"
+        peer_str: Address string like "127.0.0.1:9002" or "[::1]:9002"
         
     Returns:
         Tuple of (host, port)
@@ -34,19 +32,18 @@ def parse_peer_address(peer_str: str) -> Addr:
     Raises:
         ValueError: If address format is invalid
     """
-    try:
-        host, port_str = peer_str.rsplit(':', 1)
-        port = int(port_str)
-        
-        if not 1 <= port <= 65535:
-            raise ValueError(f"Port must be between 1 and 65535, got {port}")
-            
-        return (host, port)
-        
-    except ValueError as e:
-        if ':' not in peer_str:
-            raise ValueError(f"Peer address must be in format 'host:port', got '{peer_str}'")
-        raise ValueError(f"Invalid peer address '{peer_str}': {e}")
+    match = _PEER_RE.fullmatch(peer_str)
+    if not match:
+        raise ValueError(f"Peer address must be in format 'host:port', got '{peer_str}'")
+
+    port = int(match['port'])
+    if not 1 <= port <= 65535:
+        raise ValueError(
+            f"Invalid peer address '{peer_str}': "
+            f"Port must be between 1 and 65535, got {port}"
+        )
+
+    return (match['host'].strip('[]'), port)
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -105,9 +102,15 @@ Message syntax:
     )
 
     parser.add_argument(
-        "--use-streams",
+        "--reuse-port",
         action="store_true",
-        help="Use async streams for console input (alternative implementation)"
+        help="Set SO_REUSEPORT so several node processes can share the port"
+    )
+
+    parser.add_argument(
+        "--binary",
+        action="store_true",
+        help="Send messages in the compact binary wire format (all nodes accept both)"
     )
 
     parser.add_argument(
@@ -152,31 +155,42 @@ class MeshNodeRunner:
     def __init__(self, args: argparse.Namespace):
         self.args = args
         self.node: MeshNode = None
-        self.shutdown_event = asyncio.Event()
+        self._shutdown: Optional[asyncio.Future] = None  # created in run()
 
     def _setup_signal_handlers(self) -> None:
         """Setup signal handlers for graceful shutdown."""
         if sys.platform != 'win32':
-            # On Unix systems, handle SIGINT and SIGTERM
+            # On Unix systems, handle SIGINT, SIGTERM and (where present) SIGHUP
             loop = asyncio.get_running_loop()
-            loop.add_signal_handler(signal.SIGINT, self._signal_handler)
-            loop.add_signal_handler(signal.SIGTERM, self._signal_handler)
+            for sig in (signal.SIGINT, signal.SIGTERM, getattr(signal, 'SIGHUP', None)):
+                if sig is not None:
+                    loop.add_signal_handler(sig, self._signal_handler)
 
     def _signal_handler(self) -> None:
         """Handle shutdown signals."""
         print("\nReceived shutdown signal...")
-        self.shutdown_event.set()
+        if not self._shutdown.done():
+            self._shutdown.set_result(None)
 
     async def run(self) -> None:
         """Run the mesh node."""
         try:
+            # Start tasks eagerly so the console and background tasks
+            # begin running without waiting for the next loop iteration
+            if hasattr(asyncio, "eager_task_factory"):  # Python 3.12+
+                asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+
+            self._shutdown = asyncio.get_running_loop().create_future()
+
             # Create and configure the node
             self.node = MeshNode(
                 host=self.args.host,
                 port=self.args.port,
                 peers=self.args.peers,
                 ttl_default=self.args.ttl,
-                seen_ttl_sec=self.args.seen_ttl
+                seen_ttl_sec=self.args.seen_ttl,
+                reuse_port=self.args.reuse_port,
+                binary_wire=self.args.binary
             )
 
             # Setup signal handlers
@@ -187,17 +201,11 @@ class MeshNodeRunner:
 
             # Start console input handling
             console_task = asyncio.create_task(
-                start_console(self.node, use_streams=self.args.use_streams)
+                start_console(self.node, self._shutdown)
             )
 
-            # Wait for shutdown signal
-            try:
-                await asyncio.wait_for(
-                    self.shutdown_event.wait(),
-                    timeout=None
-                )
-            except KeyboardInterrupt:
-                pass  # Already handled by signal handler
+            # Wait for a shutdown signal (or 'quit' in the console)
+            await self._shutdown
 
             print("\nShutting down...")
 
@@ -218,6 +226,7 @@ class MeshNodeRunner:
 
 async def main() -> None:
     """Main entry point."""
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
     try:
         args = parse_arguments()
         runner = MeshNodeRunner(args)
@@ -230,5 +239,11 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Use uvloop's libuv-based event loop when it is installed
+    try:
+        import uvloop
+        runner = uvloop.run
+    except ImportError:
+        runner = asyncio.run
+    runner(main())
 
@@ -0,0 +1,156 @@
+"""
+Batched UDP sends via the Linux sendmmsg(2) system call.
+Hands one payload for many destinations to the kernel in a single syscall.
+"""
+
+import ctypes
+import ctypes.util
+import socket
+import sys
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+
+class _IOVec(ctypes.Structure):
+    # char* rather than void* so a bytes payload can be assigned directly;
+    # ctypes then points at the object's buffer instead of copying it
+    _fields_ = [
+        ("iov_base", ctypes.c_char_p),
+        ("iov_len", ctypes.c_size_t),
+    ]
+
+
+class _MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(_IOVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class _MMsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_hdr", _MsgHdr),
+        ("msg_len", ctypes.c_uint),
+    ]
+
+
+def _load_sendmmsg():
+    """Look up sendmmsg in libc, or return None where it is unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        func = libc.sendmmsg
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int]
+    func.restype = ctypes.c_int
+    return func
+
+
+_sendmmsg = _load_sendmmsg()
+
+# True when batched sends are supported on this platform
+HAVE_SENDMMSG = _sendmmsg is not None
+
+
+@lru_cache(maxsize=1024)
+def pack_sockaddr(addr: Tuple) -> Optional[bytes]:
+    """
+    Pack a numeric (host, port) address into a C sockaddr structure.
+
+    Args:
+        addr: Address tuple with a numeric IPv4 or IPv6 host
+
+    Returns:
+        Raw sockaddr_in/sockaddr_in6 bytes, or None if the host is not numeric
+    """
+    host, port = addr[0], addr[1]
+    try:
+        if ":" in host:
+            flowinfo = addr[2] if len(addr) > 2 else 0
+            scope_id = addr[3] if len(addr) > 3 else 0
+            return (
+                socket.AF_INET6.to_bytes(2, sys.byteorder)
+                + port.to_bytes(2, "big")
+                + flowinfo.to_bytes(4, "big")
+                + socket.inet_pton(socket.AF_INET6, host)
+                + scope_id.to_bytes(4, sys.byteorder)
+            )
+        return (
+            socket.AF_INET.to_bytes(2, sys.byteorder)
+            + port.to_bytes(2, "big")
+            + socket.inet_pton(socket.AF_INET, host)
+            + bytes(8)
+        )
+    except (OSError, OverflowError, TypeError):
+        return None
+
+
+class _Batch:
+    """A prebuilt mmsghdr array for one list of destinations."""
+
+    __slots__ = ("msgs", "iov", "names", "count")
+
+    def __init__(self, names: List[bytes]):
+        self.names = names  # keeps the sockaddr buffers alive
+        self.count = len(names)
+        # Every message shares one iovec, pointed at the payload per send
+        self.iov = _IOVec()
+        iov_ptr = ctypes.pointer(self.iov)
+        self.msgs = (_MMsgHdr * self.count)()
+        for msg, name in zip(self.msgs, names):
+            hdr = msg.msg_hdr
+            hdr.msg_name = ctypes.cast(ctypes.c_char_p(name), ctypes.c_void_p)
+            hdr.msg_namelen = len(name)
+            hdr.msg_iov = iov_ptr
+            hdr.msg_iovlen = 1
+
+
+@lru_cache(maxsize=256)
+def _batch_for(addrs: Tuple[Tuple, ...]) -> Optional[_Batch]:
+    """Build (once per destination tuple) the headers for the packable prefix."""
+    names = []
+    for addr in addrs:
+        name = pack_sockaddr(addr)
+        if name is None:
+            break
+        names.append(name)
+    return _Batch(names) if names else None
+
+
+def sendmmsg(fd: int, data: bytes, addrs: Sequence[Tuple]) -> int:
+    """
+    Send the same datagram to several addresses with one syscall.
+
+    Args:
+        fd: File descriptor of a bound UDP socket
+        data: Datagram payload
+        addrs: Destination addresses (numeric host, port) tuples
+
+    Returns:
+        Number of leading addresses the datagram was sent to. Anything
+        after that (including everything, on error) is left to the caller.
+
+    Headers are cached per destination tuple and only the payload pointer
+    changes between calls, so this is not safe to call from several
+    threads at once.
+    """
+    if _sendmmsg is None or not addrs:
+        return 0
+
+    batch = _batch_for(tuple(addrs))
+    if batch is None:
+        return 0
+
+    iov = batch.iov
+    iov.iov_base = data
+    iov.iov_len = len(data)
+    sent = _sendmmsg(fd, batch.msgs, batch.count, 0)
+    iov.iov_base = None  # don't keep the payload alive
+    return max(sent, 0)
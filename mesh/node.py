@@ -3,17 +3,56 @@ Mesh node implementation with UDP communication, flooding, and de-duplication.
 """
 
 import asyncio
+import logging
 import socket
+import sys
 import time
-from typing import Dict, Set, Tuple, Optional, Callable
+from collections import OrderedDict
+from typing import Dict, Iterable, Set, Tuple, Optional, Callable
 
-from .protocol import Message, InvalidJSONError
+from .mmsg import HAVE_SENDMMSG, pack_sockaddr, sendmmsg
+from .protocol import Message, chat, encode_ping, ping
 
 
+log = logging.getLogger(__name__)
+
+# Minimum interval between repeated send/receive error warnings (seconds)
+WARN_INTERVAL_SEC = 1.0
+
+# Requested kernel receive/send buffer size; the default (~212KB on Linux)
+# drops datagrams under flood bursts. The kernel may cap this.
+SOCKET_BUFFER_BYTES = 4 * 1024 * 1024
+
 # Type alias for network addresses
 Addr = Tuple[str, int]
 
 
+def _resolve_peer(peer: Addr) -> Addr:
+    """
+    Normalize a numeric peer address to the form the socket layer reports.
+
+    Hostnames are returned unchanged so no DNS lookup happens here.
+
+    Args:
+        peer: Peer address (host, port)
+
+    Returns:
+        Numeric address tuple (4-tuple for IPv6), or the original address
+    """
+    try:
+        infos = socket.getaddrinfo(
+            peer[0], peer[1],
+            type=socket.SOCK_DGRAM,
+            flags=socket.AI_NUMERICHOST | socket.AI_NUMERICSERV
+        )
+    except (socket.gaierror, UnicodeError):
+        return peer
+
+    resolved = infos[0][4]
+    pack_sockaddr(resolved)  # warm the sockaddr cache for batched sends
+    return resolved
+
+
 class MeshNode(asyncio.DatagramProtocol):
     """
     A mesh node that participates in the chat network.
@@ -25,14 +64,27 @@ class MeshNode(asyncio.DatagramProtocol):
     - TTL decrement and forwarding
     - Addressed message delivery
     """
+
+    # Attributes are read on every datagram; slots avoid a per-instance
+    # __dict__ (asyncio.DatagramProtocol itself declares empty slots)
+    __slots__ = (
+        'host', 'port', 'addr', '_label_str',
+        '_peers_set', 'peers', '_peer_sockaddrs', '_peers_except',
+        'ttl_default', 'seen_ttl_sec', 'seen_max', 'reuse_port', 'binary_wire',
+        'transport', '_sock_fd', '_sock_sendto', 'seen', 'running',
+        '_last_warn', 'display_callback',
+    )
     
     def __init__(
         self,
         host: str,
         port: int,
-        peers: Optional[Set[Addr]] = None,
+        peers: Optional[Iterable[Addr]] = None,
         ttl_default: int = 8,
-        seen_ttl_sec: int = 120
+        seen_ttl_sec: int = 120,
+        seen_max: int = 65536,
+        reuse_port: bool = False,
+        binary_wire: bool = False
     ):
         """
         Initialize a mesh node.
@@ -40,33 +92,67 @@ class MeshNode(asyncio.DatagramProtocol):
         Args:
             host: Host address to bind to
             port: Port number to bind to
-            peers: Set of peer addresses (host, port tuples)
+            peers: Peer addresses (host, port tuples)
             ttl_default: Default TTL for outgoing messages
             seen_ttl_sec: How long to remember seen message IDs
+            seen_max: Maximum number of message IDs to remember
+            reuse_port: Set SO_REUSEPORT so several processes can share the
+                        port (the kernel spreads datagrams across them)
+            binary_wire: Send our own messages in the binary wire format
+                         (received messages are forwarded in the format
+                         they arrived in; both formats are always accepted)
         """
         super().__init__()
         self.host = host
         self.port = port
         self.addr = (host, port)
-        self.peers = peers or set()
+        self._label_str = sys.intern(f"{host}:{port}")
+        # Peers change rarely but are iterated on every send, so they are
+        # kept as tuples that are rebuilt whenever a peer is added
+        self._peers_set: Set[Addr] = set(peers or ())
+        self.peers: Tuple[Addr, ...] = ()
+        self._peer_sockaddrs: Tuple[Addr, ...] = ()  # resolved form of peers
+        self._peers_except: Dict[Addr, Tuple[Addr, ...]] = {}  # peer -> all others
+        self._rebuild_peers()
         self.ttl_default = ttl_default
         self.seen_ttl_sec = seen_ttl_sec
+        self.seen_max = seen_max
+        self.reuse_port = reuse_port
+        self.binary_wire = binary_wire
         
         # Node state
         self.transport: Optional[asyncio.DatagramTransport] = None
-        self.seen: Dict[str, float] = {}  # mid -> timestamp first seen
+        self._sock_fd: Optional[int] = None  # raw fd for batched sends
+        # Bound socket.sendto, used while the transport has nothing buffered
+        self._sock_sendto: Optional[Callable[[bytes, Addr], int]] = None
+        # mid -> timestamp first seen, oldest first
+        self.seen: "OrderedDict[str, float]" = OrderedDict()
         self.running = False
         
+        # Time of the last rate-limited warning
+        self._last_warn = float("-inf")
+
         # Callback for displaying messages
         self.display_callback: Optional[Callable[[str], None]] = None
 
     def _label(self) -> str:
         """Get the node's network label (host:port)."""
-        return f"{self.host}:{self.port}"
+        return self._label_str
 
     def add_peer(self, peer: Addr) -> None:
         """Add a peer to the node's peer list."""
-        self.peers.add(peer)
+        if peer not in self._peers_set:
+            self._peers_set.add(peer)
+            self._rebuild_peers()
+
+    def _rebuild_peers(self) -> None:
+        """Rebuild the peer tuples used on the send paths."""
+        self.peers = tuple(self._peers_set)
+        self._peer_sockaddrs = tuple(_resolve_peer(p) for p in self.peers)
+        self._peers_except = {
+            peer: tuple(other for other in self._peer_sockaddrs if other != peer)
+            for peer in self._peer_sockaddrs
+        }
 
     def add_display_callback(self, callback: Callable[[str], None]) -> None:
         """Set a callback function for displaying received messages."""
@@ -78,13 +164,18 @@ class MeshNode(asyncio.DatagramProtocol):
         
         # Bind to UDP socket
         try:
+            sock = self._create_socket()
             self.transport, _ = await loop.create_datagram_endpoint(
                 lambda: self,
-                local_addr=self.addr
+                sock=sock
             )
         except OSError as e:
             raise RuntimeError(f"Failed to bind to {self.addr}: {e}")
 
+        self._sock_sendto = sock.sendto
+        if HAVE_SENDMMSG:
+            self._sock_fd = sock.fileno()
+
         self.running = True
         print(f"Node started on {self._label()}")
         
@@ -93,35 +184,73 @@ class MeshNode(asyncio.DatagramProtocol):
             print(f"Connected to peers: {', '.join(peer_labels)}")
         
         # Start background tasks
-        asyncio.create_task(self._gc_seen())
         asyncio.create_task(self._heartbeat())
 
+    def _create_socket(self) -> socket.socket:
+        """
+        Create and bind the node's UDP socket.
+
+        Returns:
+            Bound, non-blocking socket with enlarged buffers
+        """
+        family, sock_type, proto, _, sockaddr = socket.getaddrinfo(
+            self.host, self.port, type=socket.SOCK_DGRAM
+        )[0]
+        sock = socket.socket(family, sock_type, proto)
+        try:
+            if self.reuse_port:
+                if not hasattr(socket, "SO_REUSEPORT"):
+                    raise OSError("SO_REUSEPORT is not supported on this platform")
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+            for option in (socket.SO_RCVBUF, socket.SO_SNDBUF):
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, option, SOCKET_BUFFER_BYTES)
+                except OSError:
+                    pass  # Keep the system default
+
+            sock.bind(sockaddr)
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
     async def stop(self) -> None:
         """Stop the node and clean up resources."""
         self.running = False
+        self._sock_fd = None
+        self._sock_sendto = None
         if self.transport:
             self.transport.close()
         print(f"Node {self._label()} stopped")
 
-    def _should_forward(self, msg: Message, sender_addr: Addr) -> bool:
+    def _touch_seen(self, mid: str, now: float) -> bool:
         """
-        Check if a message should be forwarded (not dropped due to duplicates or TTL).
-        
+        Record a message ID as seen, expiring old IDs on the way.
+
+        Entries are inserted in arrival order, so the oldest one is always
+        at the head: expired entries are popped from the front before each
+        insert, and once the table is full the oldest entry is evicted.
+        This replaces a periodic GC task with a little work per insert.
+
         Args:
-            msg: The received message
-            sender_addr: Address of the sender
-            
+            mid: Message ID
+            now: Current time
+
         Returns:
-            True if message should be forwarded
+            True if the ID was new, False if it had already been seen
         """
-        # Don't forward if we've seen this message before
-        if msg.mid in self.seen:
-            return False
-        
-        # Don't forward if TTL has expired
-        if msg.ttl <= 0:
+        seen = self.seen
+        cutoff = now - self.seen_ttl_sec
+        while seen and next(iter(seen.values())) < cutoff:
+            seen.popitem(last=False)
+
+        # One lookup both checks and records the ID
+        if seen.setdefault(mid, now) is not now:
             return False
-            
+        if len(seen) > self.seen_max:
+            seen.popitem(last=False)
         return True
 
     def _should_display(self, msg: Message) -> bool:
@@ -134,39 +263,38 @@ class MeshNode(asyncio.DatagramProtocol):
         Returns:
             True if message should be displayed
         """
-        # Always display pings (they have no body anyway)
-        if msg.is_ping():
-            return False
-        
-        # For chat messages, check addressing
-        if msg.is_broadcast():
-            return True  # Broadcast messages are displayed everywhere
-        
-        # Addressed messages only display on the target node
-        return msg.dst == self._label()
+        # Pings are never displayed; chat is shown if broadcast or addressed to us.
+        # datagram_received inlines this same expression on the receive path.
+        return msg.kind != "PING" and (not msg.dst or msg.dst == self._label_str)
 
-    def _forward_message(self, msg: Message, sender_addr: Addr) -> None:
+    def _forward_message(
+        self,
+        msg: Message,
+        sender_addr: Addr,
+        data: Optional[bytes] = None
+    ) -> None:
         """
         Forward a message to all peers except the sender.
         
         Args:
             msg: Message to forward
             sender_addr: Address of the original sender
+            data: Raw datagram msg was decoded from, if available
         """
         if not self.transport:
             return
 
-        # Create forwarded message with decremented TTL
-        forwarded_msg = msg.copy_with(ttl=msg.ttl - 1)
-        forwarded_data = forwarded_msg.encode()
+        # Decrement the TTL in the received bytes when possible; re-encode
+        # only if the datagram is not in our compact wire form
+        forwarded_data = None
+        if data is not None:
+            forwarded_data = Message.patch_ttl(data, msg.ttl, msg.ttl - 1)
+        if forwarded_data is None:
+            forwarded_data = msg.with_ttl(msg.ttl - 1).encode()
 
         # Forward to all peers except the sender
-        for peer in self.peers:
-            if peer != sender_addr:
-                try:
-                    self.transport.sendto(forwarded_data, peer)
-                except Exception as e:
-                    print(f"Failed to forward message to {peer}: {e}")
+        targets = self._peers_except.get(sender_addr, self._peer_sockaddrs)
+        self._sendto_many(forwarded_data, targets)
 
     def _display_message(self, msg: Message) -> None:
         """
@@ -195,31 +323,37 @@ class MeshNode(asyncio.DatagramProtocol):
             data: Raw packet data
             addr: [sender's address]
         """
-        try:
-            # Decode the message
-            msg = Message.decode(data)
-        except (InvalidJSONError, KeyError, ValueError) as e:
-            # Silently ignore malformed messages
-            print(f"Failed to decode message from {addr}: {e}")
+        now = time.time()
+
+        # Most flooded datagrams are copies of a message we already have;
+        # recognize those from the raw bytes and skip decoding them
+        mid = Message.peek_mid(data)
+        if mid is not None:
+            first_seen = self.seen.get(mid)
+            if first_seen is not None and first_seen >= now - self.seen_ttl_sec:
+                return
+
+        # Decode the message; malformed datagrams are expected on an open
+        # port, so they are dropped without raising
+        msg = Message.try_decode(data)
+        if msg is None:
+            log.debug("Dropped malformed datagram from %s", addr)
             return
 
-        # Check if we should process this message
-        if not self._should_forward(msg, addr):
+        # Drop expired messages, then check-and-record the ID (duplicates stop here)
+        if msg.ttl <= 0 or not self._touch_seen(msg.mid, now):
             return
 
-        # Record this message as seen
-        self.seen[msg.mid] = time.time()
-
-        # Display the message if appropriate
-        if self._should_display(msg):
+        # Display chat messages that are broadcast or addressed to us
+        if msg.kind != "PING" and (not msg.dst or msg.dst == self._label_str):
             self._display_message(msg)
 
         # Forward the message (with decremented TTL)
-        self._forward_message(msg, addr)
+        self._forward_message(msg, addr, data)
 
     def error_received(self, exc: Exception) -> None:
-        """Handle UDP transmission errors."""
-        print(f"UDP error: {exc}")
+        """Handle UDP transmission errors (e.g. ICMP port unreachable)."""
+        self._warn("UDP error: %s", exc)
 
     def connection_lost(self, exc: Optional[Exception]) -> None:
         """Called when the UDP transport is closed."""
@@ -230,6 +364,56 @@ class MeshNode(asyncio.DatagramProtocol):
 
     # Message sending methods
 
+    def _sendto_many(self, data: bytes, peers: Iterable[Addr]) -> None:
+        """
+        Send the same datagram to several peers.
+
+        While the transport has nothing buffered, the datagram goes straight
+        to the socket: one sendmmsg(2) call where available, then a plain
+        socket.sendto() for whatever the batch did not cover. Once the
+        kernel buffer fills (or before start()), transport.sendto() takes
+        over so asyncio queues the rest and handles backpressure.
+
+        Args:
+            data: Encoded message
+            peers: Target peer addresses
+        """
+        transport = self.transport
+        if not transport:
+            return
+
+        peers = tuple(peers)
+        sent = 0
+        sock_sendto = None
+        if not transport.get_write_buffer_size():
+            sock_sendto = self._sock_sendto
+            if self._sock_fd is not None:
+                sent = sendmmsg(self._sock_fd, data, peers)
+
+        for peer in peers[sent:]:
+            try:
+                if sock_sendto is not None:
+                    try:
+                        sock_sendto(data, peer)
+                        continue
+                    except (BlockingIOError, InterruptedError):
+                        sock_sendto = None  # buffer full: queue via transport
+                transport.sendto(data, peer)
+            except Exception as e:
+                self._warn("Failed to send to peer %s: %s", peer, e)
+
+    def _warn(self, fmt: str, *args) -> None:
+        """
+        Log a warning at most once per WARN_INTERVAL_SEC.
+
+        Send and receive errors can repeat for every datagram; this keeps
+        them from flooding the log and stalling the event loop.
+        """
+        now = time.monotonic()
+        if now - self._last_warn >= WARN_INTERVAL_SEC:
+            self._last_warn = now
+            log.warning(fmt, *args)
+
     def _send(self, msg: Message, peer: Addr) -> None:
         """
         Send a message to a specific peer.
@@ -246,7 +430,7 @@ class MeshNode(asyncio.DatagramProtocol):
             data = msg.encode()
             self.transport.sendto(data, peer)
         except Exception as e:
-            print(f"Failed to send message to {peer}: {e}")
+            self._warn("Failed to send message to %s: %s", peer, e)
 
     def say(self, text: str, dst: str = "") -> None:
         """
@@ -261,9 +445,8 @@ class MeshNode(asyncio.DatagramProtocol):
             return
 
         # Create the message
-        from .protocol import chat
         msg = chat(
-            src=self._label(),
+            src=self._label_str,
             body=text,
             ttl=self.ttl_default,
             dst=dst
@@ -273,57 +456,27 @@ class MeshNode(asyncio.DatagramProtocol):
         if self._should_display(msg):
             self._display_message(msg)
 
-        # Record as seen to prevent loops
-        self.seen[msg.mid] = time.time()
+        # Record as seen to prevent loops (msg.ts is the time chat() just read)
+        self._touch_seen(msg.mid, msg.ts)
 
         # Send to all peers
-        data = msg.encode()
-        for peer in self.peers:
-            try:
-                self.transport.sendto(data, peer)
-            except Exception as e:
-                print(f"Failed to send to peer {peer}: {e}")
+        data = msg.encode_binary() if self.binary_wire else msg.encode()
+        self._sendto_many(data, self._peer_sockaddrs)
 
     def ping_peers(self) -> None:
         """Send ping messages to all peers."""
         if not self.transport or not self.peers:
             return
 
-        from .protocol import ping
-        msg = ping(src=self._label(), ttl=4)
-        data = msg.encode()
-        
-        for peer in self.peers:
-            try:
-                self.transport.sendto(data, peer)
-            except Exception as e:
-                print(f"Failed to ping peer {peer}: {e}")
+        self._sendto_many(self._ping_frame(), self._peer_sockaddrs)
 
-    # Background tasks
+    def _ping_frame(self) -> bytes:
+        """Encode a fresh heartbeat ping in this node's wire format."""
+        if self.binary_wire:
+            return ping(src=self._label_str).encode_binary()
+        return encode_ping(src=self._label_str)
 
-    async def _gc_seen(self) -> None:
-        """Garbage collect old entries from seen messages."""
-        while self.running:
-            try:
-                await asyncio.sleep(5)  # Run every 5 seconds
-                
-                now = time.time()
-                to_remove = []
-                
-                for mid, first_seen in self.seen.items():
-                    if now - first_seen > self.seen_ttl_sec:
-                        to_remove.append(mid)
-                
-                for mid in to_remove:
-                    del self.seen[mid]
-                
-                if to_remove:
-                    print(f"Cleaned {len(to_remove)} old message IDs")
-                    
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                print(f"Error in GC task: {e}")
+    # Background tasks
 
     async def _heartbeat(self) -> None:
         """Periodically send ping messages to peers."""
@@ -4,9 +4,11 @@ Tests for de-duplication functionality in mesh nodes.
 
 import asyncio
 import pytest
+import socket
 import time
 from unittest.mock import Mock, patch
 
+from mesh.mmsg import HAVE_SENDMMSG, pack_sockaddr, sendmmsg
 from mesh.protocol import Message, chat
 from mesh.node import MeshNode
 
@@ -333,3 +335,140 @@ class TestNodeIntegration:
         b_forwards = [msg for sender, msg, addr in sent_messages if sender == "b"]
         assert len(b_forwards) > 0
         assert b_forwards[0].ttl < original_msg.ttl
+
+
+class TestBatchedSend:
+    """Test sendmmsg-based fanout to multiple peers."""
+
+    @pytest.mark.skipif(not HAVE_SENDMMSG, reason="sendmmsg not available")
+    def test_sendmmsg_reaches_all_peers(self):
+        """Test that one batched send delivers the datagram to every peer."""
+        receivers = []
+        for _ in range(3):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(("127.0.0.1", 0))
+            sock.settimeout(1)
+            receivers.append(sock)
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender.bind(("127.0.0.1", 0))
+
+        try:
+            addrs = [sock.getsockname() for sock in receivers]
+            sent = sendmmsg(sender.fileno(), b"batched", addrs)
+
+            assert sent == len(addrs)
+            for sock in receivers:
+                assert sock.recvfrom(1024)[0] == b"batched"
+        finally:
+            sender.close()
+            for sock in receivers:
+                sock.close()
+
+    def test_sendmmsg_stops_at_non_numeric_host(self):
+        """Test that hostnames are left for the per-peer fallback."""
+        assert pack_sockaddr(("localhost", 9002)) is None
+        assert sendmmsg(-1, b"data", [("localhost", 9002)]) == 0
+
+    def test_peers_resolved_once(self):
+        """Test that peers are normalized when added, not on every send."""
+        node = MeshNode("127.0.0.1", 9001, peers={("127.0.0.1", 9002)})
+        node.add_peer(("::1", 9003))
+        node.add_peer(("::1", 9003))  # Duplicate is ignored
+
+        assert sorted(node._peer_sockaddrs, key=len) == [
+            ("127.0.0.1", 9002),
+            ("::1", 9003, 0, 0),
+        ]
+
+    def test_fallback_without_raw_socket(self):
+        """Test that nodes without a raw socket send via the transport."""
+        node = MeshNode(
+            "127.0.0.1", 9001,
+            peers={("127.0.0.1", 9002), ("127.0.0.1", 9003)}
+        )
+        node.transport = Mock()
+
+        node._sendto_many(b"data", node.peers)
+
+        sent_to = {call[0][1] for call in node.transport.sendto.call_args_list}
+        assert sent_to == set(node.peers)
+
+    def test_raw_sendto_falls_back_on_full_buffer(self):
+        """Test that the raw socket is bypassed once the kernel buffer is full."""
+        node = MeshNode(
+            "127.0.0.1", 9001,
+            peers={("localhost", 9002), ("localhost", 9003)}
+        )
+        node.transport = Mock()
+        node.transport.get_write_buffer_size.return_value = 0
+        node._sock_sendto = Mock(side_effect=[None, BlockingIOError()])
+
+        node._sendto_many(b"data", node._peer_sockaddrs)
+
+        # First peer went straight to the socket, the second was queued
+        assert node._sock_sendto.call_count == 2
+        assert node.transport.sendto.call_count == 1
+
+
+class TestPingFrame:
+    """Test the cached ping encoding."""
+
+    def test_ping_frame_decodes(self):
+        """Test that templated pings decode to fresh, valid messages."""
+        node = MeshNode("127.0.0.1", 9001)
+
+        first = Message.decode(node._ping_frame())
+        second = Message.decode(node._ping_frame())
+
+        assert first.is_ping()
+        assert first.src == "127.0.0.1:9001"
+        assert first.ttl == 4
+        assert first.ts > 0
+        assert first.mid != second.mid
+
+
+class TestSeenTable:
+    """Test bounds and expiry of the seen-message table."""
+
+    def test_seen_evicts_oldest_when_full(self):
+        """Test that the seen table never grows beyond seen_max."""
+        node = MeshNode("127.0.0.1", 9001, seen_max=3)
+
+        for i in range(5):
+            node._touch_seen(f"mid-{i}", float(i))
+
+        assert list(node.seen) == ["mid-2", "mid-3", "mid-4"]
+
+    def test_seen_expires_on_insert(self):
+        """Test that expired IDs are dropped when a new ID is recorded."""
+        node = MeshNode("127.0.0.1", 9001, seen_ttl_sec=10)
+        node._touch_seen("old", 100.0)
+        node._touch_seen("recent", 105.0)
+
+        assert node._touch_seen("new", 112.0)
+
+        assert list(node.seen) == ["recent", "new"]
+        assert not node._touch_seen("recent", 112.0)  # Still a duplicate
+
+    def test_duplicates_skip_decoding(self):
+        """Test that known message IDs are dropped before a full decode."""
+        node = MeshNode("127.0.0.1", 9001, {("127.0.0.1", 9002)})
+        node.transport = Mock()
+        data = chat("127.0.0.1:9003", "flooded", ttl=5).encode()
+        node.datagram_received(data, ("127.0.0.1", 9003))
+
+        with patch.object(Message, "decode", side_effect=AssertionError):
+            node.datagram_received(data, ("127.0.0.1", 9002))
+
+        assert node.transport.sendto.call_count == 1
+
+    def test_expired_duplicate_is_decoded(self):
+        """Test that an ID past seen_ttl_sec is not treated as known."""
+        node = MeshNode("127.0.0.1", 9001, {("127.0.0.1", 9002)}, seen_ttl_sec=10)
+        node.transport = Mock()
+        msg = chat("127.0.0.1:9003", "replayed", ttl=5)
+        node.seen[msg.mid] = time.time() - 60
+
+        node.datagram_received(msg.encode(), ("127.0.0.1", 9003))
+
+        assert node.transport.sendto.called
@@ -0,0 +1,84 @@
+"""
+Property-based tests for encoding, decoding and addressing.
+
+Skipped when hypothesis is not installed (pip install -e ".[test]").
+"""
+
+import json
+
+import pytest
+
+hypothesis = pytest.importorskip("hypothesis")
+from hypothesis import given, strategies as st  # noqa: E402
+
+from mesh import protocol  # noqa: E402
+from mesh.protocol import Message, parse_addressed_message  # noqa: E402
+
+
+# Field sizes stay within the binary format's length bytes (u8, body u16)
+labels = st.text(min_size=1, max_size=40)
+messages = st.builds(
+    Message,
+    mid=labels,
+    ts=st.floats(min_value=0, max_value=1e10, allow_nan=False),
+    ttl=st.integers(min_value=0, max_value=10_000),
+    kind=st.sampled_from(["CHAT", "PING"]),
+    src=labels,
+    dst=st.one_of(st.just(""), labels),
+    body=st.text(max_size=2000),
+)
+# Destination labels never contain whitespace (input is split on a space)
+destinations = st.text(min_size=1).filter(
+    lambda s: not any(c.isspace() for c in s)
+)
+
+
+class TestRoundTripProperties:
+    """Test that any valid message survives both wire formats."""
+
+    @given(msg=messages)
+    def test_roundtrip_property(self, msg):
+        """Test that decode(encode(msg)) returns the original message."""
+        assert Message.decode(msg.encode()) == msg
+
+    @given(msg=messages)
+    def test_binary_roundtrip_property(self, msg):
+        """Test that decode(encode_binary(msg)) returns the original message."""
+        assert Message.decode(msg.encode_binary()) == msg
+
+    @given(msg=messages)
+    def test_stdlib_encoder_property(self, msg):
+        """Test that the stdlib fallback encoder matches json.dumps."""
+        expected = json.dumps(msg._asdict(), separators=(",", ":")).encode()
+
+        assert protocol._json_encode_fields(msg) == expected
+
+    @given(msg=messages.filter(lambda m: m.ttl > 0))
+    def test_patch_ttl_property(self, msg):
+        """Test that patching the TTL in place matches re-encoding."""
+        for data in (msg.encode(), msg.encode_binary()):
+            patched = Message.patch_ttl(data, msg.ttl, msg.ttl - 1)
+
+            assert patched is not None
+            assert Message.decode(patched) == msg.with_ttl(msg.ttl - 1)
+
+
+class TestAddressingProperties:
+    """Test @host:port parsing against arbitrary input."""
+
+    @given(text=st.text().filter(lambda s: s.strip()[:1] != "@"))
+    def test_parse_broadcast_property(self, text):
+        """Test that input without a leading @ is a broadcast."""
+        msg = parse_addressed_message(text, "127.0.0.1:9001", 5)
+
+        assert msg.dst == ""
+        assert msg.body == text.strip()
+
+    @given(dst=destinations, body=st.text())
+    def test_parse_addressed_message_property(self, dst, body):
+        """Test that @dst body splits into dst and the (right-stripped) body."""
+        msg = parse_addressed_message(f"@{dst} {body}", "127.0.0.1:9001", 5)
+
+        assert msg.dst == dst
+        assert msg.body == body.rstrip()
+        assert msg.ttl == 5
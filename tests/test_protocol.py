@@ -7,11 +7,14 @@ import pytest
 import uuid
 import time
 
-from mesh.protocol import Message, InvalidJSONError, chat, ping, parse_addressed_message
+from mesh.protocol import (
+    Message, InvalidJSONError, chat, encode_ping, new_mid, ping,
+    parse_addressed_message, split_addressed
+)
 
 
 class TestMessage:
-    """Test Message dataclass and basic functionality."""
+    """Test Message type and basic functionality."""
 
     def test_message_creation(self):
         """Test creating a valid message."""
@@ -32,6 +35,15 @@ class TestMessage:
         assert msg.dst == ""
         assert msg.body == "hello world"
 
+    def test_message_is_immutable(self):
+        """Test that message fields cannot be reassigned."""
+        msg = Message(
+            mid="123", ts=0, ttl=1, kind="CHAT",
+            src="127.0.0.1:9001", dst="", body="hello"
+        )
+        with pytest.raises(AttributeError):
+            msg.ttl = 5
+
     def test_is_broadcast(self):
         """Test broadcast detection."""
         broadcast_msg = Message(
@@ -191,6 +203,14 @@ class TestMessageDecoding:
         with pytest.raises(ValueError):
             Message.decode(json.dumps(data).encode())
 
+        # Boolean TTL (JSON true is not a number)
+        data = {
+            "mid": "test", "ts": 0, "ttl": True,
+            "kind": "CHAT", "src": "127.0.0.1:9001", "dst": "", "body": ""
+        }
+        with pytest.raises(ValueError):
+            Message.decode(json.dumps(data).encode())
+
         # Invalid message kind
         data = {
             "mid": "test", "ts": 0, "ttl": 5, "kind": "INVALID",
@@ -199,6 +219,45 @@ class TestMessageDecoding:
         with pytest.raises(ValueError):
             Message.decode(json.dumps(data).encode())
 
+    def test_decode_null_dst_is_broadcast(self):
+        """Test that a JSON null destination decodes as broadcast."""
+        data = {
+            "mid": "test", "ts": 0, "ttl": 5, "kind": "CHAT",
+            "src": "127.0.0.1:9001", "dst": None, "body": "hi"
+        }
+        msg = Message.decode(json.dumps(data).encode())
+
+        assert msg.dst == ""
+        assert msg.is_broadcast()
+
+    def test_decode_non_object(self):
+        """Test decoding valid JSON that is not an object."""
+        for payload in (b"5", b"[1, 2]", b'"text"', b"null"):
+            with pytest.raises(ValueError):
+                Message.decode(payload)
+
+    def test_try_decode(self):
+        """Test that try_decode returns None instead of raising."""
+        msg = chat("127.0.0.1:9001", "hello", ttl=5)
+        missing = json.dumps({"mid": "test", "ts": 0}).encode()
+
+        assert Message.try_decode(msg.encode()) == msg
+        assert Message.try_decode(msg.encode_binary()) == msg
+        assert Message.try_decode(b"invalid json data") is None
+        assert Message.try_decode(missing) is None
+        assert Message.try_decode(msg.encode_binary()[:-1]) is None
+
+    def test_decode_many(self):
+        """Test batch decoding keeps positions and marks invalid entries."""
+        first = chat("127.0.0.1:9001", "first", ttl=5)
+        second = chat("127.0.0.1:9002", "second", ttl=5)
+
+        decoded = Message.decode_many(
+            [first.encode(), b"garbage", second.encode_binary()]
+        )
+
+        assert decoded == [first, None, second]
+
     def test_round_trip_encoding(self):
         """Test that encode/decode preserves all fields."""
         original_msg = Message(
@@ -217,6 +276,77 @@ class TestMessageDecoding:
         assert decoded_msg == original_msg
 
 
+class TestBinaryEncoding:
+    """Test the compact binary wire format."""
+
+    def test_binary_round_trip(self):
+        """Test that encode_binary/decode preserves all fields."""
+        msg = Message(
+            mid="binary-uuid", ts=12345.678, ttl=300, kind="CHAT",
+            src="127.0.0.1:9001", dst="127.0.0.1:9002", body="Hello 世界! 🚀"
+        )
+
+        encoded = msg.encode_binary()
+
+        assert len(encoded) < len(msg.encode())
+        assert Message.decode(encoded) == msg
+
+    def test_binary_ping_round_trip(self):
+        """Test that pings survive the binary format."""
+        msg = ping(src="127.0.0.1:9001")
+        assert Message.decode(msg.encode_binary()) == msg
+
+    def test_binary_truncated(self):
+        """Test that truncated or padded frames are rejected."""
+        encoded = chat("127.0.0.1:9001", "hello", ttl=5).encode_binary()
+
+        with pytest.raises(ValueError):
+            Message.decode(encoded[:10])
+        with pytest.raises(ValueError):
+            Message.decode(encoded[:-1])
+        with pytest.raises(ValueError):
+            Message.decode(encoded + b"x")
+
+    def test_binary_invalid_kind(self):
+        """Test that unknown kind codes are rejected."""
+        encoded = bytearray(chat("127.0.0.1:9001", "hi", ttl=5).encode_binary())
+        encoded[3] = 9  # kind byte follows version and ttl
+
+        with pytest.raises(ValueError):
+            Message.decode(bytes(encoded))
+
+    def test_binary_unencodable(self):
+        """Test that fields too large for the header are reported."""
+        msg = chat("127.0.0.1:9001", "hi", ttl=5, dst="x" * 300)
+
+        with pytest.raises(ValueError):
+            msg.encode_binary()
+
+
+class TestPeekMid:
+    """Test reading the message ID without a full decode."""
+
+    def test_peek_mid_json_and_binary(self):
+        """Test that peek_mid matches the decoded mid for both formats."""
+        msg = chat("127.0.0.1:9001", "peek", ttl=5)
+
+        assert Message.peek_mid(msg.encode()) == msg.mid
+        assert Message.peek_mid(msg.encode_binary()) == msg.mid
+
+    def test_peek_mid_gives_up_on_other_layouts(self):
+        """Test that unusual encodings fall back to a full decode."""
+        escaped = Message(
+            mid='a"b', ts=0, ttl=1, kind="CHAT",
+            src="127.0.0.1:9001", dst="", body=""
+        ).encode()
+        spaced = b'{"mid": "x", "ts": 0}'
+
+        assert Message.peek_mid(escaped) is None
+        assert Message.peek_mid(spaced) is None
+        assert Message.peek_mid(b"") is None
+        assert Message.peek_mid(b"\x01short") is None
+
+
 class TestMessageFactories:
     """Test factory functions for creating messages."""
 
@@ -268,6 +398,36 @@ class TestMessageFactories:
         assert msg.is_broadcast()
         assert msg.is_ping()
 
+    def test_new_mid_unique(self):
+        """Test that generated message IDs are distinct, short hex strings."""
+        mids = [new_mid() for _ in range(500)]
+
+        assert len(set(mids)) == len(mids)
+        assert len({mid[:16] for mid in mids}) == 1  # one tag per process
+        for mid in mids:
+            assert len(mid) < 32
+            int(mid, 16)
+
+    def test_factory_explicit_mid(self):
+        """Test that factories use a caller-supplied message ID."""
+        assert chat("127.0.0.1:9001", "hi", ttl=5, mid="fixed").mid == "fixed"
+        assert ping("127.0.0.1:9001", mid="fixed-ping").mid == "fixed-ping"
+
+    def test_factory_explicit_ts(self):
+        """Test that factories use a caller-supplied timestamp."""
+        assert chat("127.0.0.1:9001", "hi", ttl=5, ts=1234.5).ts == 1234.5
+        assert ping("127.0.0.1:9001", ts=0).ts == 0
+
+    def test_encode_ping_matches_encode(self):
+        """Test that the ping fast path emits exactly Message.encode() output."""
+        for src, ts in (("127.0.0.1:9001", 1730563200.123), ('odd "src"', 5)):
+            msg = ping(src, ttl=3, mid="ping-mid", ts=ts)
+
+            encoded = encode_ping(src, ttl=3, mid="ping-mid", ts=ts)
+
+            assert Message.decode(encoded) == msg
+            assert json.loads(encoded) == json.loads(msg.encode())
+
     def test_ping_factory_default_ttl(self):
         """Test ping factory with default TTL."""
         msg = ping(src="127.0.0.1:9001")
@@ -329,6 +489,12 @@ class TestAddressedMessageParsing:
         # Whitespace is stripped by parse_addressed_message
         assert msg.body == ""
 
+    def test_split_addressed(self):
+        """Test splitting input into destination and body."""
+        assert split_addressed("hello world") == ("", "hello world")
+        assert split_addressed("  @127.0.0.1:9003 hi  ") == ("127.0.0.1:9003", "hi")
+        assert split_addressed("@127.0.0.1:9003") == ("127.0.0.1:9003", "")
+
 
 class TestMessageIntegration:
     """Integration tests for message handling."""
@@ -360,6 +526,23 @@ class TestMessageIntegration:
         assert modified.mid == "original"  # Unchanged
         assert modified.src == "127.0.0.1:9001"  # Unchanged
 
+    def test_copy_with_rejects_unknown_fields(self):
+        """Test that copy_with only accepts Message field names."""
+        original = chat("127.0.0.1:9001", "original", ttl=5)
+
+        with pytest.raises(ValueError):
+            original.copy_with(hops=3)
+
+    def test_with_ttl(self):
+        """Test the TTL-only copy used when forwarding."""
+        original = Message(
+            mid="original", ts=0, ttl=5, kind="CHAT",
+            src="127.0.0.1:9001", dst="", body="original"
+        )
+
+        assert original.with_ttl(4) == original.copy_with(ttl=4)
+        assert original.ttl == 5
+
 
 def test_unicode_handling():
     """Test that Unicode characters are handled correctly."""
@@ -380,6 +563,44 @@ def test_unicode_handling():
     assert decoded == msg
 
 
+def test_stdlib_json_fallback(monkeypatch):
+    """Test that the stdlib codec (used without orjson) is interchangeable."""
+    import mesh.protocol as protocol
+
+    msg = chat("127.0.0.1:9001", "Hello 世界!", ttl=5, dst="127.0.0.1:9002")
+    fast_encoded = msg.encode()
+
+    monkeypatch.setattr(protocol, "_dumps", protocol._json_dumps)
+    monkeypatch.setattr(protocol, "_loads", protocol._json_loads)
+    monkeypatch.setattr(protocol, "_encode_fields", protocol._json_encode_fields)
+    encoded = msg.encode()
+
+    assert Message.decode(encoded) == msg
+    assert Message.decode(fast_encoded) == msg
+    assert Message.peek_mid(encoded) == msg.mid
+    assert Message.decode(Message.patch_ttl(encoded, 5, 4)).ttl == 4
+
+
+@pytest.mark.parametrize("ts, ttl, src", [
+    (1.5, 3, "127.0.0.1:9001"),
+    (7, 3, 'quote " and \\ backslash'),
+    (float("inf"), 3, "control \n\x00 chars"),
+    (1.5, True, "bool ttl"),
+    (1.5, 3, None),
+])
+def test_stdlib_encoder_matches_json_dumps(ts, ttl, src):
+    """Test that the specialised stdlib encoder matches json.dumps exactly."""
+    import mesh.protocol as protocol
+
+    fields = ("mid", ts, ttl, "CHAT", src, "", "Hello 世界!")
+    expected = json.dumps(
+        dict(zip(("mid", "ts", "ttl", "kind", "src", "dst", "body"), fields)),
+        separators=(",", ":")
+    ).encode()
+
+    assert protocol._json_encode_fields(fields) == expected
+
+
 def test_edge_case_values():
     """Test edge cases for various fields."""
     # Zero TTL (should be valid)
@@ -2,6 +2,7 @@
 Tests for TTL (Time To Live) behavior in mesh nodes.
 """
 
+import json
 import pytest
 from unittest.mock import Mock
 
@@ -246,3 +247,57 @@ class TestCustomTTLMessages:
         
         ping_msg_custom = ping("127.0.0.1:9001", ttl=8)
         assert ping_msg_custom.ttl == 8
+
+
+class TestForwardTTLPatch:
+    """Test that forwarding rewrites the TTL in the received bytes."""
+
+    @pytest.fixture
+    def node(self):
+        """Create a node with a mocked transport."""
+        node = MeshNode("127.0.0.1", 9001, {("127.0.0.1", 9002)})
+        node.transport = Mock()
+        return node
+
+    def test_forwarded_bytes_only_differ_in_ttl(self, node):
+        """Test that the forwarded datagram is the received one with TTL - 1."""
+        data = chat("127.0.0.1:9003", 'body with "ttl":7 inside', ttl=10).encode()
+
+        node.datagram_received(data, ("127.0.0.1", 9003))
+
+        forwarded = node.transport.sendto.call_args[0][0]
+        assert forwarded == data.replace(b'"ttl":10,', b'"ttl":9,')
+        assert Message.decode(forwarded).body == 'body with "ttl":7 inside'
+
+    def test_patch_ttl_rejects_non_compact_input(self):
+        """Test that patch_ttl defers to re-encoding for unusual layouts."""
+        spaced = b'{"mid": "m", "ts": 0, "ttl": 5}'
+        repeated = b'{"ttl":5,"ttl":5}'
+
+        assert Message.patch_ttl(spaced, 5, 4) is None
+        assert Message.patch_ttl(repeated, 5, 4) is None
+        assert Message.patch_ttl(b'{"ttl":55}', 5, 4) is None
+
+    def test_forward_non_compact_json(self, node):
+        """Test that datagrams from other encoders are re-encoded."""
+        data = json.dumps({
+            "mid": "spaced", "ts": 1.0, "ttl": 3, "kind": "CHAT",
+            "src": "127.0.0.1:9003", "dst": "", "body": "hi"
+        }).encode()
+
+        node.datagram_received(data, ("127.0.0.1", 9003))
+
+        forwarded = Message.decode(node.transport.sendto.call_args[0][0])
+        assert forwarded.mid == "spaced"
+        assert forwarded.ttl == 2
+
+    def test_forward_binary_keeps_format(self, node):
+        """Test that binary datagrams are forwarded as binary with TTL - 1."""
+        data = chat("127.0.0.1:9003", "binary hop", ttl=6).encode_binary()
+
+        node.datagram_received(data, ("127.0.0.1", 9004))
+
+        forwarded = node.transport.sendto.call_args[0][0]
+        assert forwarded[:1] == data[:1]
+        assert len(forwarded) == len(data)
+        assert Message.decode(forwarded) == Message.decode(data).copy_with(ttl=5)